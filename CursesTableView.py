@@ -264,7 +264,7 @@ class CursesTableView:
 
         Returns: None
         """
-        exception_first_line = str(exception).split("\n")[0] if exception != None else ""
+        exception_first_line = str(exception).split("\n", 1)[0] if exception != None else ""
         exception_first_line = exception_first_line[:self.max_column_width] if len(exception_first_line) > self.max_column_width else exception_first_line
         prompt_text = f"Error: {exception_first_line}\nMsg: {msg}\nPress v to view the exception..." if exception != None else f"Error: {msg}\nPress any key to continue..."
 
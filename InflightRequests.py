@@ -0,0 +1,29 @@
+import threading
+from concurrent.futures import Future
+
+# Lets threads asking for the same thing at the same time share a single request
+class InflightRequests:
+    def __init__(self):
+        # key -> Future for requests in progress
+        self.inflight = {}
+        self.lock = threading.Lock()
+
+    # Calls fetch() and returns its result, or if a request for key is already in progress waits for that one instead
+    def get(self, key, fetch):
+        with self.lock:
+            future = self.inflight.get(key)
+            is_owner = future == None
+            if is_owner:
+                future = Future()
+                self.inflight[key] = future
+
+        if is_owner:
+            try:
+                future.set_result(fetch())
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                with self.lock:
+                    del self.inflight[key]
+
+        return future.result()
@@ -7,74 +7,92 @@ import MyJira
 from MyJira import MyJira
 from MyJiraConfig import MyJiraConfig
 from MyJira import MyJiraIssue
-from XrayApi import XrayApi
+from XrayApi import XrayApi, create_session
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+import functools
+import io
+import re
+import threading
 
-class MyTestDefinitions:
-    _definitions = []
-    _folder = None
-    _test_plan = None
-    _fix_versions = []
+MAX_CONCURRENT_TESTS = 8
+
+# xray-ui makes a JiraXrayIssue for every action, so they all share one session to reuse connections between actions
+xray_session = create_session()
+
+# Finds the first line starting with a <begin> marker, case insensitively
+BEGIN_MARKER_PATTERN = re.compile(r'^<begin>', re.IGNORECASE | re.MULTILINE)
 
-    def __init__(self, folder, test_plan=None, fix_versions=[]):
-        self._definitions = []
-        self._folder = folder
-        self._test_plan = test_plan
-        self._fix_versions = fix_versions
+# Matches, case insensitively, either a <begin>/<end> marker, a "Tag: value" line or a given/and/when/then step
+DEFINITION_LINE_PATTERN = re.compile(r'<(begin|end)>|\s*(?:(folder|solution test plan|fix versions|name|description|steps):(.*)|(given|and|when|then))', re.IGNORECASE)
+
+@dataclass(slots=True)
+class MyTestDefinitions:
+    folder: str
+    test_plan: str = None
+    fix_versions: list = field(default_factory=list)
+    definitions: list = field(default_factory=list)
 
     def add(self, definition):
-        self._definitions.append(definition)
+        self.definitions.append(definition)
 
     def __iter__(self):
-        return iter(self._definitions)
+        return iter(self.definitions)
 
     def __len__(self):
-        return len(self._definitions)
+        return len(self.definitions)
 
     def get_folder(self):
-        return self._folder
+        return self.folder
 
     def get_test_plan(self):
-        return self._test_plan
+        return self.test_plan
 
     def is_existing_test_plan(self):
-        return self._test_plan is not None and self._test_plan.startswith('EPM-')
+        return self.test_plan is not None and self.test_plan.startswith('EPM-')
 
     def get_fix_versions(self):
-        return self._fix_versions
+        return self.fix_versions
 
     def set_fix_versions(self, fix_versions):
-        self._fix_versions = fix_versions
+        self.fix_versions = fix_versions
 
     def __str__(self):
-        ret = f"Folder: {self._folder}\nSolution Test Plan: {self._test_plan}\nFix Versions: {self._fix_versions}\n"
-        for definition in self._definitions:
+        ret = f"Folder: {self.folder}\nSolution Test Plan: {self.test_plan}\nFix Versions: {self.fix_versions}\n"
+        for definition in self.definitions:
             ret += f"\n{definition}"
         return ret
 
+@dataclass(slots=True)
 class MyTestDefinition:
-    _name = None
-    _description = None
-    _steps = []
-
-    def __init__(self, name, description, steps):
-        self._name = name
-        self._description = description
-        self._steps = steps
+    name: str
+    description: str
+    steps: list = field(default_factory=list)
 
     def __str__(self):
-        ret = f"""Test name: {self._name}
-Description: {self._description}
+        ret = f"""Test name: {self.name}
+Description: {self.description}
 """
-        for step in self._steps:
+        for step in self.steps:
             ret += f"  {step}\n"
         return ret
 
+class DefinitionParseState:
+    NONE = 0        # Not within a test definition
+    DETAILS = 1     # After a Name:, looking for the Description: and Steps:
+    STEPS = 2       # Collecting the given/and/when/then steps
+
+def requires_initialize(method):
+    """Decorates a JiraXrayIssue method so that the issue is initialized before the method runs"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if not self._initiated:
+            self.initialize()
+        return method(self, *args, **kwargs)
+    return wrapper
+
 class JiraXrayIssue:
-    _jira = None
-    _jira_issue = None
-    _issueid = None
-    _initiated = False
-    _api = None
+    __slots__ = ('_jira', '_jira_issue', '_issueid', '_initiated', '_initialize_lock', '_needs_refresh', '_api', '_parsed_definitions')
 
     def __init__(self, issue, jira):
         """Constructs the object, issue can be a string or a Jira issue object.  Passing the latter is more efficient but less up to date"""
@@ -83,36 +101,41 @@ class JiraXrayIssue:
         if jira is None:
             raise ValueError('Jira cannot be None')
         self._jira = jira
+        self._initiated = False
+        self._initialize_lock = threading.Lock()
+        self._parsed_definitions = None     # (test_results, definitions) from the last parse
         if isinstance(issue, str):
             # We're looking it up by key so will have to retrieve from server
             self._jira_issue = self._jira.get_issue_by_key(issue)
+            self._needs_refresh = False
         else:
             self._jira_issue = issue
+            self._needs_refresh = True
         self._issueid = self._jira_issue.key
-        self._api = XrayApi(MyJiraConfig().load().get('xray'))
+        self._api = XrayApi(MyJiraConfig().load().get('xray'), session=xray_session)
 
     def initialize(self):
         if self._initiated:
             return
-        self._api.authenticate()
-        issues = self._jira.get_sprint_issues()
-        for issue in issues:
-            if issue.key == self._issueid:
-                self._jira_issue = issue
-                self._initiated = True
+        # Test cases are created from several threads, make sure only one of them authenticates
+        with self._initialize_lock:
+            if self._initiated:
                 return
+            self._api.authenticate()
+            # An issue passed in may be out of date, refresh just this issue rather than fetching the whole sprint to find it
+            # This isn't limited to the team's project, escalations and search results can have tests too
+            if self._needs_refresh:
+                self._jira_issue = self._jira.jira.issue(self._issueid)
+                self._needs_refresh = False
+            self._initiated = True
 
     def get_definitions_and_tests(self):
-        issue = MyJiraIssue(self._jira_issue)
-        test_results = issue.test_results
         definitions = self.parse_test_definitions()
         tests = self.get_tests()
         return (definitions, tests)
 
     def get_test_info(self):
         try:
-            issue = MyJiraIssue(self._jira_issue)
-            test_results = issue.test_results
             definitions = self.parse_test_definitions()
             if len(definitions) > 0:
                 tests = self.get_tests()
@@ -130,19 +153,17 @@ class JiraXrayIssue:
 
     def sprint_item_has_valid_tests(self):
         try:
-            issue = MyJiraIssue(self._jira_issue)
-            test_results = issue.test_results
             definitions = self.parse_test_definitions()
             return len(definitions) > 0 and definitions.get_folder() is not None
         except Exception as e:
             return False
 
+    @requires_initialize
     def get_jira_issue(self):
-        self.initialize()
         return self._jira_issue
 
+    @requires_initialize
     def create_test_template(self):
-        self.initialize()
         wrapped_issue = MyJiraIssue(self._jira_issue)
         template = """
 <begin>
@@ -165,58 +186,86 @@ Then <Step 3>
             wrapped_issue.test_results += template
         self._jira_issue.update(fields={wrapped_issue.test_results_fieldname: wrapped_issue.test_results})
 
+    @requires_initialize
     def get_tests(self):
-        self.initialize()
         tests = self._jira.get_linked_issues(self._jira_issue, 'Test')
         return tests
 
     def delete_tests(self):
-        for test in self.get_tests():
-            test.delete(deleteSubtasks=True)
+        # Delete concurrently, carrying on past any failures so that as many tests as possible are removed
+        with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_TESTS) as executor:
+            futures = {executor.submit(test.delete, deleteSubtasks=True): test for test in self.get_tests()}
+        failures = [f"{test.key}: {future.exception()}" for future, test in futures.items() if future.exception() is not None]
+        if len(failures) > 0:
+            raise Exception(f"Failed to delete {len(failures)} tests: {', '.join(failures)}")
 
     def parse_test_definitions(self):
-        issue = MyJiraIssue(self._jira_issue)
+        """Parses the test definitions from the test results field, the same object is returned while the field is unchanged"""
+        test_results = MyJiraIssue(self._jira_issue).test_results
+        if self._parsed_definitions is not None and self._parsed_definitions[0] == test_results:
+            return self._parsed_definitions[1]
+
+        definitions = self.parse_test_definitions_text(test_results)
+        self._parsed_definitions = (test_results, definitions)
+        return definitions
+
+    @staticmethod
+    def parse_test_definitions_text(test_results):
+        """Parses test definitions from the text of a test results field"""
+        # Nothing is parsed before the first <begin>, so skip straight to it
+        begin = BEGIN_MARKER_PATTERN.search(test_results)
+        test_results = test_results[begin.start():] if begin else ''
+
         all_definitions = []
-        lines = issue.test_results.split('\n')
         folder = None
         test_plan = None
         fix_versions = []
-        i = 0
         processing = False
-        while i < len(lines):
-            line = lines[i]
-            if line.lower().startswith('<begin>'):
-                processing = True
-            elif line.lower().startswith('<end>'):
-                processing = False
+
+        # Single pass over the lines, the state tracks which part of the current test definition we're in
+        state = DefinitionParseState.NONE
+        name = None
+        description = ''
+        steps = []
+        for line in io.StringIO(test_results):
+            match = DEFINITION_LINE_PATTERN.match(line)
+            marker, tag, value, step = match.groups() if match else (None, None, None, None)
+            if tag is not None:
+                tag = tag.lower()
+                value = value.strip()
+
+            if state == DefinitionParseState.STEPS:
+                if step is not None:
+                    steps.append(line.strip())
+                    continue
+                state = DefinitionParseState.NONE
+            elif state == DefinitionParseState.DETAILS:
+                if tag == 'name':
+                    state = DefinitionParseState.NONE
+                elif tag == 'description':
+                    description = value
+                elif tag == 'steps':
+                    state = DefinitionParseState.STEPS
+
+            if marker is not None:
+                processing = marker.lower() == 'begin'
             if processing:
-                lwrline = line.lower().strip()
-                if lwrline.startswith('folder:'):
-                    folder = line.split(':')[1].strip()
-                elif lwrline.startswith('solution test plan:'):
-                    test_plan = line.split(':')[1].strip()
-                elif lwrline.startswith('fix versions:'):
-                    fix_versions = line.split(':')[1].strip().split(',')
-                elif lwrline.startswith('name:'):
-                    name = line.split(':')[1].strip()
+                if tag == 'folder':
+                    folder = value
+                elif tag == 'solution test plan':
+                    test_plan = value
+                elif tag == 'fix versions':
+                    fix_versions = [version.strip() for version in value.split(',')]
+                elif tag == 'name':
+                    if name is not None:
+                        all_definitions.append(MyTestDefinition(name, description, steps))
+                    name = value
                     description = ''
                     steps = []
-                    for j in range(i + 1, len(lines)):
-                        line_lwr_j = lines[j].lower().strip()
-                        if line_lwr_j.startswith('name:'):
-                            break
-                        elif line_lwr_j.startswith('description:'):
-                            description = lines[j].split(':')[1].strip()
-                        elif line_lwr_j.startswith('steps:'):
-                            for k in range(j + 1, len(lines)):
-                                line_lwr_k = lines[k].lower().strip()
-                                if line_lwr_k.startswith(('given', 'and', 'when', 'then')):
-                                    steps.append(lines[k].strip())
-                                else:
-                                    break
-                            break
-                    all_definitions.append(MyTestDefinition(name, description, steps))
-            i += 1
+                    state = DefinitionParseState.DETAILS
+
+        if name is not None:
+            all_definitions.append(MyTestDefinition(name, description, steps))
 
         definitions = MyTestDefinitions(folder, test_plan, fix_versions)
         for definition in all_definitions:
@@ -224,48 +273,66 @@ Then <Step 3>
 
         return definitions
 
+    @requires_initialize
     def create_test_cases(self, definitions, step_callback=None):
-        self.initialize()
-
         folder = definitions.get_folder()
 
         if not folder.startswith('/'):
             raise ValueError(f'Folder {folder} must be a folder within the test respository and must start with a /')
         self._api.create_folder(folder)
 
-        tests = []
-        for definition in definitions:
-            test = self.create_test_case(definition, folder)
-            if step_callback is not None:
-                step_callback(f"Created test case {test.key}")
-            tests.append(test)
-        return tests
-
-    def create_test_case(self, definition, folder):
-        self.initialize()
-        api = self._api
-        steps_str = '\n'.join(definition._steps)
-        issue_id = api.create_test(definition._name, definition._description, 'Manual (Gherkin)', folder, steps_str)
+        # The sprint item is the same for every test case, so only wrap it once
+        sprint_issue = MyJiraIssue(self._jira_issue)
 
+        # Each test case is several round trips to Xray and Jira, so create them concurrently
+        # Carry on past any failures, a test that was created but not linked can't be found to delete it again
+        with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_TESTS) as executor:
+            created = {executor.submit(self.__create_xray_test_issue, definition, folder): definition for definition in definitions}
+            failures = [f"{definition.name}: {future.exception()}" for future, definition in created.items() if future.exception() is not None]
+            issues = [future.result() for future in created if future.exception() is None]
+
+            linked = {executor.submit(self.__link_test_case, issue, sprint_issue): issue for issue in issues}
+            for future in as_completed(linked):
+                if future.exception() is None and step_callback is not None:
+                    step_callback(f"Created test case {future.result().key}")
+        failures += [f"{issue.key}: {future.exception()}" for future, issue in linked.items() if future.exception() is not None]
+        if len(failures) > 0:
+            raise Exception(f"Failed to create {len(failures)} tests: {', '.join(failures)}")
+        return [future.result() for future in linked]
+
+    @requires_initialize
+    def create_test_case(self, definition, folder, sprint_issue=None):
         # Xray creates an issue in Jira, but we need to link it to the sprint item
-        issues = self._jira.search_for_issue(issue_id)
-        if (len(issues) != 1):
-            raise ValueError(f'Expected 1 test case created, but found {len(issues)}')
-        issue = issues[0]
-        self._jira.jira.create_issue_link('Test', issue, self._jira_issue)
-
-        # Update some important fields to match the PBI
-        sprint_issue = MyJiraIssue(self._jira_issue)
-        test_issue = MyJiraIssue(issue)
+        issue = self.__create_xray_test_issue(definition, folder)
+        return self.__link_test_case(issue, sprint_issue)
+
+    def __create_xray_test(self, definition, folder):
+        """Creates the test in Xray, returning the key of the Jira issue it creates"""
+        steps_str = '\n'.join(definition.steps)
+        return self._api.create_test(definition.name, definition.description, 'Manual (Gherkin)', folder, steps_str)
+
+    def __create_xray_test_issue(self, definition, folder):
+        """Creates the test in Xray, returning the Jira issue it creates"""
+        key = self.__create_xray_test(definition, folder)
+        # Fetch the new issue directly, Jira's search may not have indexed it yet
+        # Only its id and key are used, so don't ship every field back
+        return self._jira.jira.issue(key, fields="summary")
+
+    def __link_test_case(self, issue, sprint_issue=None):
+        """Links a created test issue to the sprint item and copies across the product and team"""
+        if sprint_issue is None:
+            sprint_issue = MyJiraIssue(self._jira_issue)
         product_name = sprint_issue.product.value
-        test_issue.issue.update(fields={test_issue.product_fieldname: {"value": product_name},
-            test_issue.team_fieldname: sprint_issue.team.id})
+        fields = {MyJiraIssue.translations["product"]: {"value": product_name}, MyJiraIssue.translations["team"]: sprint_issue.team.id}
 
+        # Test cases are already linked concurrently by create_test_cases, so make these two requests in turn
+        self._jira.jira.create_issue_link('Test', issue, self._jira_issue)
+        issue.update(fields=fields)
         return issue
 
+    @requires_initialize
     def create_update_test_plan(self, definitions, test_ids):
         """ Creates or updates a test plan with the given test cases, returns True if a new test plan was created """
-        self.initialize()
         api = self._api
         test_plan_issues = self._jira.get_testplan_by_name(definitions.get_test_plan())
         if (len(test_plan_issues) > 0):
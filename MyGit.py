@@ -1,21 +1,25 @@
 #scriptdoc: title="My shortcuts for doing stuff with the local repo", tags="bt,work,git"
 
 # pip install gitpython
-from git import Repo
 import os
 import re
 
+# gitpython is slow to import, so only load it when a git command is actually used
+def open_repo(path):
+    from git import Repo
+    return Repo(path)
+
 class MyGit:
     def __init__(self, config):
         self.support_dir = os.path.join(os.path.expanduser("~"), "Support")
         self.initials = config.get("initials")
 
     def current_branch(self):
-        repo = Repo('.')
+        repo = open_repo('.')
         return repo.active_branch.name
 
     def create_branch_for_issue(self, issue_number, summary):
-        repo = Repo('.')
+        repo = open_repo('.')
         if repo.is_dirty():
             raise Exception("Repo is dirty")
 
@@ -1,10 +1,10 @@
 import requests
 import datetime
+from InflightRequests import InflightRequests
 
 #scriptdoc: title="My comms library for talking to github", tags="bt,work,github"
 
-# pip install PyGithub
-from github import Github
+# pip install PyGithub, imported on first use as it is slow to load and only needed to create PRs
 
 class MyGithub:
     def __init__(self, config):
@@ -16,7 +16,11 @@ class MyGithub:
             "Accept": "application/vnd.github.v3+json",
             "Authorization": f"token {self.token}" }
 
-        self.github = Github(self.login, self.token)
+        self.github = None
+
+        # Share one session so that repeated requests reuse the same keep-alive connection rather than a new TLS handshake
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
 
         # Endpoints
         self.repo_owner = config.get("repo_owner")
@@ -24,25 +28,49 @@ class MyGithub:
         self.pull_endpoint = f"{self.api_endpoint}/repos/{self.repo_owner}/{self.repo_name}/pulls"
         self.pull_query = f"{self.api_endpoint}/search/issues?q=repo:{self.repo_owner}/{self.repo_name}"
 
+        # url -> (etag, json), github doesn't count 304 Not Modified responses against the rate limit
+        self.etag_cache = {}
+
+        # Concurrent callers for the same url share a single request
+        self.inflight = InflightRequests()
+
     def create_pull(self, title, body, head, base):
+        if self.github == None:
+            from github import Github
+            self.github = Github(self.login, self.token)
         repo = self.github.get_repo(f"{self.repo_owner}/{self.repo_name}")
         return repo.create_pull(title=title, body=body, head=head, base=base)
     
-    # Make a request to get the pull requests assigned to you, and return the json
-    def get_prs(self):
-        response = requests.get(self.pull_endpoint, headers=self.headers)
+    # Make a GET request for json, waiting on an identical request if one is already in progress
+    def get_json(self, url):
+        return self.inflight.get(url, lambda: self.__get_json_conditional(url))
+
+    # Make a conditional GET request, returning the previously fetched json if github reports it is unchanged
+    def __get_json_conditional(self, url):
+        headers = None
+        cached = self.etag_cache.get(url)
+        if cached != None:
+            headers = {"If-None-Match": cached[0]}
+        response = self.session.get(url, headers=headers)
+        if response.status_code == 304 and cached != None:
+            return cached[1]
         if response.status_code != 200:
             raise Exception(f"Failed to get pull requests: {response.text}")
-        return response.json()
+        result = response.json()
+        etag = response.headers.get("ETag")
+        if etag != None:
+            self.etag_cache[url] = (etag, result)
+        return result
+
+    # Make a request to get the pull requests assigned to you, and return the json
+    def get_prs(self):
+        return self.get_json(self.pull_endpoint)
 
     def get_prs_query(self, query):
-        response = requests.get(f"{self.pull_query}+{query}", headers=self.headers)
-        if response.status_code != 200:
-            raise Exception(f"Failed to get pull requests: {response.text}")
+        query_prs = self.get_json(f"{self.pull_query}+{query}")["items"]
 
         # We only get partial information with the query, so look up the full PRs
         all_prs = self.get_prs()
-        query_prs = response.json()["items"]
         prs = []
         for pr in all_prs:
             if pr["number"] in [query_pr["number"] for query_pr in query_prs]:
@@ -52,8 +80,7 @@ class MyGithub:
     # Get the number of days since the PR was created
     def get_pr_agedays(self, pr):
         created_at = pr["created_at"]
-        date = created_at.split("T")[0]
-        time = created_at.split("T")[1].split("Z")[0]
+        date = created_at.split("T", 1)[0]
         # days since created
         return str((datetime.datetime.now() - datetime.datetime.strptime(date, "%Y-%m-%d")).days)
 
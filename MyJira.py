@@ -2,40 +2,88 @@
 
 # pip install jira
 from jira import JIRA
+from requests.adapters import HTTPAdapter
 import json
 import os
+import re
 import datetime
+import time
+import threading
 import webbrowser
+from concurrent.futures import ThreadPoolExecutor
+from InflightRequests import InflightRequests
+
+# How long search results are reused by default, can be overridden with search_cache_seconds in the config
+SEARCH_CACHE_SECONDS = 60
+
+# How long the active sprint of a board is reused before asking the server again
+SPRINT_CACHE_SECONDS = 60
+
+MAX_CONCURRENT_DOWNLOADS = 8
+
+# An issue key that search_for_issue looks up directly rather than searching summaries for
+ISSUE_KEY_PATTERN = re.compile(r'^(EPM|HELP)-\d+$', re.IGNORECASE)
+
+# The issue types shown in the backlog and sprint views
+ISSUE_FILTER = '(Story, Bug, Spike, Automation, Vulnerability, Support, Task, "Technical Improvement", "Sub-task Bug", "Customer Defect")'
+
+# The issue types that can't be chosen when creating an issue
+IGNORED_ISSUE_TYPES = frozenset({"Sub-task", "Sub-task Bug", "Test", "Test Set", "Test Plan", "Test Execution", "Precondition", "Sub Test Execution"})
+
+# Background workers for callers that don't want to block on a request, see submit()
+MAX_BACKGROUND_REQUESTS = 8
+
+# The number of issues a search returns unless the caller asks for more or fewer
+MAX_SEARCH_RESULTS = 400
+
+# Enough pooled connections that the concurrent downloads, searches and test creation all reuse sockets
+POOL_CONNECTIONS = 4
+POOL_MAXSIZE = 32
+
+# Sensible names for the issue fields we use, mapped to the Jira field names
+FIELD_TRANSLATIONS = {
+        "description": "description",
+        "summary": "summary",
+        "repro_steps": "customfield_10093",
+        "actual_results": "customfield_10094",
+        "expected_results": "customfield_10095",
+        "customer_repro_steps": "customfield_10121",
+        "relevant_environment": "customfield_10134",
+        "sprint": "customfield_10020",
+        "story_points": "customfield_10028",
+        "product": "customfield_10108",
+        "test_results": "customfield_10097",
+        "team": "customfield_10001",
+        "test_steps": "customfield_10039",
+        "priority_score": "customfield_10718",
+    }
+
+# The only fields searches ask the server for, wide custom field schemas make whole issues expensive to ship
+SEARCH_FIELDS = ["status", "assignee", "issuetype", "created", "updated", "subtasks", "parent", "project", "attachment"] + list(FIELD_TRANSLATIONS.values())
 
 # A wrapper for issues that allow us to translate atttributes to sensible names
 class MyJiraIssue:
+    translations = FIELD_TRANSLATIONS
+
+    # A slot per translated attribute rather than an instance dict, these are created for every row
+    __slots__ = ('issue',) + tuple(FIELD_TRANSLATIONS)
+
     def __init__(self, issue):
         self.issue = issue
-        self.translations = {
-                "description": "description",
-                "summary": "summary",
-                "repro_steps": "customfield_10093",
-                "actual_results": "customfield_10094",
-                "expected_results": "customfield_10095",
-                "customer_repro_steps": "customfield_10121",
-                "relevant_environment": "customfield_10134",
-                "sprint": "customfield_10020",
-                "story_points": "customfield_10028",
-                "product": "customfield_10108",
-                "test_results": "customfield_10097",
-                "team": "customfield_10001",
-                "test_steps": "customfield_10039",
-                "priority_score": "customfield_10718",
-            }
 
-        for key in self.translations:
-            try:
-                # Dynamically set the attribute on this object to the value of the attribute on the issue
-                setattr(self, key, getattr(issue.fields, self.translations[key]))
-                setattr(self, key + "_fieldname", self.translations[key])
-            except:
-                setattr(self, key, "")
-                setattr(self, key + "_fieldname", self.translations[key])
+    # Translated attributes are looked up the first time they're used rather than copying every field when wrapping
+    # Each gives the value of the field on the issue, or "" if it's missing, and <name>_fieldname gives the field name
+    def __getattr__(self, name):
+        field = self.translations.get(name)
+        if field != None:
+            value = getattr(getattr(self.issue, "fields", None), field, "")
+            setattr(self, name, value)
+            return value
+        if name.endswith("_fieldname"):
+            field = self.translations.get(name[:-len("_fieldname")])
+            if field != None:
+                return field
+        raise AttributeError(f"'MyJiraIssue' object has no attribute '{name}'")
 
 class MyJira:
     def __init__(self, config):
@@ -48,16 +96,50 @@ class MyJira:
         self.username = config["username"]
         self.fullname = config["fullname"]
 
-        # Stuff specific to the team
-        self.set_team(config["default_team"])
-
         self.jira = JIRA(self.server, basic_auth=(self.username, self.password))
-        self.issue_filter = '(Story, Bug, Spike, Automation, Vulnerability, Support, Task, "Technical Improvement", "Sub-task Bug", "Customer Defect")' 
-        self.ignored_issue_types = {"Sub-task", "Sub-task Bug", "Test", "Test Set", "Test Plan", "Test Execution", "Precondition", "Sub Test Execution"}
+        adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+        self.jira._session.mount('https://', adapter)
+        self.jira._session.mount('http://', adapter)
+        self.issue_filter = ISSUE_FILTER
+        self.ignored_issue_types = IGNORED_ISSUE_TYPES
 
         # We use the reference issue as a template for creating new issues/tasks
         self.reference_issue = None
 
+        # (query, max results) -> (time fetched, issues) for searches, cleared whenever we change anything
+        self.search_cache = {}
+        self.search_cache_seconds = config.get("search_cache_seconds", SEARCH_CACHE_SECONDS)
+
+        # The optional column getters never change, so build them once rather than on every view rebuild
+        self.optional_fields = self.__build_optional_fields()
+
+        # project id -> issue types grouped by use, these rarely change so they're only fetched once per session
+        self.issue_types_cache = {}
+
+        # board id -> (time fetched, sprint id) for the active sprint of each board
+        self.active_sprint_cache = {}
+
+        # Threads are only started when something is first submitted
+        self.background = ThreadPoolExecutor(max_workers=MAX_BACKGROUND_REQUESTS, thread_name_prefix="jira-io")
+
+        # Concurrent callers for the same (query, max results) share a single request
+        self.searches_in_progress = InflightRequests()
+
+        # Bumped whenever the search cache is cleared, so a search that was already running doesn't cache a stale result
+        self.search_generation = 0
+
+        # Stuff specific to the team, set last as it starts warming the caches above
+        self.set_team(config["default_team"])
+
+    # Runs any of our methods on a background thread so the caller can carry on, e.g. submit(jira.get_backlog_issues)
+    # Returns a Future for the result
+    def submit(self, method, *args, **kwargs):
+        return self.background.submit(method, *args, **kwargs)
+
+    # Stops the background threads, dropping any work that hasn't started so that quitting isn't held up
+    def close(self):
+        self.background.shutdown(wait=False, cancel_futures=True)
+
     def set_team(self, team_name):
         self.team_name = team_name
         current_team = self.config['teams'][team_name]
@@ -68,10 +150,27 @@ class MyJira:
         self.project_name = current_team["project_name"]
         self.product_name = current_team["product_name"]
         self.short_names_to_ids = current_team["short_names_to_ids"]
+        self.short_names = tuple(self.short_names_to_ids)
         self.kanban_board_id = current_team["kanban_board_id"]
         self.backlog_board_id = current_team["backlog_board_id"]
         self.escalation_board_id = current_team["escalation_board_id"]
 
+        self.sprint_board_url = f"{self.url}/secure/RapidBoard.jspa?rapidView={self.backlog_board_id}"
+        self.backlog_board_url = f"{self.url}/secure/RapidBoard.jspa?rapidView={self.backlog_board_id}&view=planning.nodetail"
+        self.kanban_board_url = f"{self.url}/secure/RapidBoard.jspa?rapidView={self.kanban_board_id}"
+
+        # The view queries only depend on the team, so build them once here rather than on every search
+        self.backlog_query = f'project = {self.project_name} AND "Team[Team]"={self.team_id} AND issuetype in {ISSUE_FILTER} AND (sprint is EMPTY or sprint not in openSprints()) AND statuscategory not in (Done) AND (issuetype != Sub-task AND issuetype != "Sub-task Bug") ORDER BY Rank ASC'
+        self.windows_backlog_query = f'project = {self.project_name} AND "Team[Team]" is EMPTY AND issuetype in {ISSUE_FILTER} AND (sprint is EMPTY or sprint not in openSprints()) AND statuscategory not in (Done) AND (issuetype != Sub-task AND issuetype != "Sub-task Bug") ORDER BY Rank ASC'
+        self.sprint_query = f'project = {self.project_name} AND "Team[Team]"={self.team_id} AND issuetype in {ISSUE_FILTER} AND sprint in openSprints() AND (issuetype != Sub-task AND issuetype != "Sub-task Bug") ORDER BY Rank ASC'
+        self.escalation_query = f'project = HELP AND "Product[Dropdown]" in ("{self.product_name}") AND statuscategory not in (Done) ORDER BY Rank ASC'
+        self.search_by_number_query = f'(project = {self.project_name} OR project = HELP) AND "Product[Dropdown]" in ("{self.product_name}") AND id = \'{self.project_name}-{{search_text}}\' AND (issuetype != Sub-task AND issuetype != "Sub-task Bug") ORDER BY Rank ASC'
+        self.search_by_summary_query = f'(project = {self.project_name} OR project = HELP) AND "Product[Dropdown]" in ("{self.product_name}") AND summary ~ \'{{search_text}}*\' AND (issuetype != Sub-task AND issuetype != "Sub-task Bug") ORDER BY Rank ASC'
+
+    # Starts fetching the sprint or backlog view in the background, so a caller can set itself up while the view it's about to show downloads
+    def warm_up(self, sprint):
+        self.submit(self.__fetch_search, self.sprint_query if sprint else self.backlog_query, MAX_SEARCH_RESULTS)
+
     def get_teams(self):
         list_teams = []
         for team in self.config['teams']:
@@ -91,14 +190,18 @@ class MyJira:
         return self.search_issues(query)
 
     def get_age(self, issue):
-        created = datetime.datetime.strptime(issue.fields.created, '%Y-%m-%dT%H:%M:%S.%f%z').replace(tzinfo=None)
-        now = datetime.datetime.now().replace(tzinfo=None)
+        # fromisoformat understands Jira's timestamps and is far quicker than strptime
+        created = datetime.datetime.fromisoformat(issue.fields.created).replace(tzinfo=None)
+        now = datetime.datetime.now()
         age = now - created
         return age.days
 
     # Returns a dictionary of optional field names lambda functions to get the value of each field from an issue
     def get_optional_fields(self):
-        optional_fields = {
+        return self.optional_fields
+
+    def __build_optional_fields(self):
+        return {
                 "Assignee": lambda issue: str(issue.fields.assignee),
                 "Created": lambda issue: str(issue.fields.created[0:16].replace("T", " ")),
                 "Updated": lambda issue: str(issue.fields.updated[0:16].replace("T", " ")),
@@ -109,55 +212,99 @@ class MyJira:
                 "Parent Desc": lambda issue: self.get_parent_description(issue),
                 "Pri Score": lambda issue: str(self.get_priority_score(issue)),
             }
-        return optional_fields
 
     def get_subtask_count(self, issue):
         return len(issue.fields.subtasks)
 
     def get_parent_description(self, issue):
-        issue_dict = issue.raw
-        parent = issue_dict.get("fields", {}).get("parent", None)
-        summary = parent.get("fields", {}).get("summary", "") if parent != None else ""
+        parent = getattr(issue.fields, "parent", None)
+        summary = getattr(getattr(parent, "fields", None), "summary", "") if parent != None else ""
         if len(summary) > 30:
             summary = summary[0:30] + "..."
         return summary
 
-    def search_issues(self, search_text):
-        issues = self.jira.search_issues(search_text, startAt=0, maxResults=400)
+    # Returns the issues matching the query, reusing the results of a recent identical search unless use_cache is False
+    # Only the team views (sprint, backlog, windows shared and boards) search through here, escalations and
+    # issue searches always go to the server. UIs should invalidate_search() when the user asks for a view
+    # so that the cache only serves internal re-renders
+    def search_issues(self, search_text, max_results=MAX_SEARCH_RESULTS, use_cache=True):
+        cache_key = (search_text, max_results)
+        cached = self.search_cache.get(cache_key) if use_cache else None
+        if cached != None and time.monotonic() - cached[0] < self.search_cache_seconds:
+            issues = cached[1]
+        elif use_cache:
+            issues = self.__fetch_search(search_text, max_results)
+        else:
+            issues = self.jira.search_issues(search_text, startAt=0, maxResults=max_results, fields=SEARCH_FIELDS)
+
         if (len(issues) > 0):
             self.reference_issue = issues[0]
         return issues
 
+    # Searches the server and caches the result, waiting on an identical search if one is already in progress
+    # Unlike search_issues this leaves the reference issue alone, so it's safe to call in the background
+    def __fetch_search(self, search_text, max_results):
+        cache_key = (search_text, max_results)
+
+        def fetch():
+            generation = self.search_generation
+            issues = self.jira.search_issues(search_text, startAt=0, maxResults=max_results, fields=SEARCH_FIELDS)
+            if generation == self.search_generation:
+                self.search_cache[cache_key] = (time.monotonic(), issues)
+            return issues
+
+        return self.searches_in_progress.get(cache_key, fetch)
+
     def get_testplan_by_name(self, name):
-        return self.jira.search_issues(f'project = {self.project_name} AND issuetype = "Test Plan" AND summary ~ "{name}" ORDER BY Rank ASC')
+        return self.jira.search_issues(f'project = {self.project_name} AND issuetype = "Test Plan" AND summary ~ "{name}" ORDER BY Rank ASC', maxResults=1)
 
     def get_backlog_issues(self):
-        return self.search_issues(f'project = {self.project_name} AND "Team[Team]"={self.team_id} AND issuetype in {self.issue_filter} AND (sprint is EMPTY or sprint not in openSprints()) AND statuscategory not in (Done) AND (issuetype != Sub-task AND issuetype != "Sub-task Bug") ORDER BY Rank ASC')
+        return self.search_issues(self.backlog_query)
 
     def get_windows_backlog_issues(self):
-        return self.search_issues(f'project = {self.project_name} AND "Team[Team]" is EMPTY AND issuetype in {self.issue_filter} AND (sprint is EMPTY or sprint not in openSprints()) AND statuscategory not in (Done) AND (issuetype != Sub-task AND issuetype != "Sub-task Bug") ORDER BY Rank ASC')
+        return self.search_issues(self.windows_backlog_query)
 
     def get_sprint_issues(self):
-        return self.search_issues(f'project = {self.project_name} AND "Team[Team]"={self.team_id} AND issuetype in {self.issue_filter} AND sprint in openSprints() AND (issuetype != Sub-task AND issuetype != "Sub-task Bug") ORDER BY Rank ASC')
+        return self.search_issues(self.sprint_query)
 
     def get_issue_by_key(self, key):
-        issues = self.search_issues(f'project = {self.project_name} AND key = {key}')
+        # Fetching two is enough to tell whether the key was unique
+        issues = self.search_issues(f'project = {self.project_name} AND key = {key}', max_results=2, use_cache=False)
         if len(issues) != 1:
             raise Exception(f"Expected 1 issue with key {key}, but found {len(issues)}")
         return issues[0]
 
+    # Returns the issues with the given keys using a single search, in no particular order
+    # fields may restrict the fields fetched, by default every field is fetched
+    def get_issues_by_keys(self, keys, fields=None):
+        if len(keys) == 0:
+            return []
+        return self.jira.search_issues(f'key in ({", ".join(keys)})', maxResults=len(keys), fields=fields)
+
+    # Forget all cached search results, so that the next search of each view fetches from the server
+    def invalidate_search(self):
+        self.search_generation += 1
+        self.search_cache.clear()
+
+    # Returns a copy of the issue with every field, searches only fetch the fields in SEARCH_FIELDS
+    def get_full_issue(self, issue):
+        return self.jira.issue(issue.key)
+
     def add_comment(self, issue, comment):
+        self.invalidate_search()
         self.jira.add_comment(issue, comment)
 
     def search_for_issue(self, search_text):
         issues = [] 
 
-        if (search_text.lower().startswith("epm-") or search_text.lower().startswith("help-")):
-            issues = [self.jira.issue(search_text)]
+        # Several keys separated by spaces or commas are fetched together with one search
+        keys = search_text.replace(",", " ").split()
+        if (len(keys) > 0 and all(ISSUE_KEY_PATTERN.match(key) for key in keys)):
+            issues = [self.jira.issue(keys[0])] if len(keys) == 1 else self.get_issues_by_keys(keys, SEARCH_FIELDS)
         elif (search_text.isdigit()):
-            issues = self.jira.search_issues(f'(project = {self.project_name} OR project = HELP) AND "Product[Dropdown]" in ("{self.product_name}") AND id = \'{self.project_name}-{search_text}\' AND (issuetype != Sub-task AND issuetype != "Sub-task Bug") ORDER BY Rank ASC')
+            issues = self.jira.search_issues(self.search_by_number_query.format(search_text=search_text), fields=SEARCH_FIELDS)
         else:
-            issues = self.jira.search_issues(f'(project = {self.project_name} OR project = HELP) AND "Product[Dropdown]" in ("{self.product_name}") AND summary ~ \'{search_text}*\' AND (issuetype != Sub-task AND issuetype != "Sub-task Bug") ORDER BY Rank ASC')
+            issues = self.jira.search_issues(self.search_by_summary_query.format(search_text=search_text), fields=SEARCH_FIELDS)
 
         if (len(issues) > 0):
             self.reference_issue = issues[0]
@@ -165,7 +312,7 @@ class MyJira:
         return issues
 
     def get_escalation_issues(self):
-        issues = self.jira.search_issues(f'project = HELP AND "Product[Dropdown]" in ("{self.product_name}") AND statuscategory not in (Done) ORDER BY Rank ASC')
+        issues = self.jira.search_issues(self.escalation_query, fields=SEARCH_FIELDS)
         if (len(issues) > 0):
             self.reference_issue = issues[0]
         return issues
@@ -178,6 +325,7 @@ class MyJira:
         original_description = self.get_body(issue)
         new_description = f"Spike to investigate {issue.key} : {url}\n\n**Original Description**\n\n{original_description}"
         new_issue = self.create_sprint_issue(new_title, new_description, "Spike")
+        self.invalidate_search()
         self.jira.create_issue_link("Relates", issue, new_issue)
         return new_issue
 
@@ -186,31 +334,42 @@ class MyJira:
         return linked_issues
 
     def set_story_points(self, issue, points):
-        wrappedIssue = MyJiraIssue(issue)
-        wrappedIssue.story_points = points
-        issue.update(fields={wrappedIssue.story_points_fieldname: points})
+        self.invalidate_search()
+        issue.update(fields={FIELD_TRANSLATIONS["story_points"]: points})
 
     def get_sub_tasks(self, issue):
-        sub_tasks = self.jira.search_issues(f'project = {self.project_name} AND parent={issue.key} AND (issuetype = Sub-task OR issuetype = "Sub-task Bug") ORDER BY Rank ASC')
+        sub_tasks = self.jira.search_issues(f'project = {self.project_name} AND parent={issue.key} AND (issuetype = Sub-task OR issuetype = "Sub-task Bug") ORDER BY Rank ASC', fields=SEARCH_FIELDS)
         return sub_tasks
 
     def set_rank_above(self, issue, above_issue):
+        self.invalidate_search()
         self.jira.rank(issue.key, above_issue.key)
 
     def set_rank_below(self, issue, below_issue):
+        self.invalidate_search()
         self.jira.rank(issue.key, None, below_issue.key)
 
     def move_to_backlog(self, issue):
+        self.invalidate_search()
         self.jira.move_to_backlog([issue.key])
 
-    def move_to_sprint(self, issue):
-        # Get the current sprint for my team
+    # Returns the id of the current sprint for my team, reusing it if it was fetched recently
+    def get_active_sprint_id(self):
+        cached = self.active_sprint_cache.get(self.backlog_board_id)
+        if cached != None and time.monotonic() - cached[0] < SPRINT_CACHE_SECONDS:
+            return cached[1]
+
         sprints = self.jira.sprints(self.backlog_board_id, extended=True, startAt=0, maxResults=1, state='active')
         if len(sprints) > 0:
             sprint_id = sprints[0].id
         else:
             raise Exception("No active sprint found")
-        
+        self.active_sprint_cache[self.backlog_board_id] = (time.monotonic(), sprint_id)
+        return sprint_id
+
+    def move_to_sprint(self, issue):
+        sprint_id = self.get_active_sprint_id()
+        self.invalidate_search()
         self.jira.add_issues_to_sprint(sprint_id, [issue.key])
 
     def add_titled_section(self, body, title, content):
@@ -218,7 +377,9 @@ class MyJira:
             body += f"**{title}**\n\n{content}\n\n"
         return body
 
-    def get_body(self, issue, include_comments=False):
+    # Returns the issue's description sections, optionally followed by its comments newest first
+    # comment_limit restricts the comments to that many of the newest
+    def get_body(self, issue, include_comments=False, comment_limit=None):
         wrapped_issue = MyJiraIssue(issue)
         whole_description = ""
         whole_description = self.add_titled_section(whole_description, "Description", wrapped_issue.description)
@@ -230,14 +391,16 @@ class MyJira:
 
         if (include_comments):
             comments = self.jira.comments(issue.key)
-            comments.reverse()
-            for comment in comments:
+            if comment_limit != None:
+                comments = comments[-comment_limit:] if comment_limit > 0 else []
+            for comment in reversed(comments):
                 whole_description = self.add_titled_section(whole_description, f"Comment by {comment.author.displayName}", comment.body)
 
         return whole_description
 
     def create_backlog_issue(self, title, description, issue_type):
         issue_dict = self.__build_issue(None, title, description, issue_type)
+        self.invalidate_search()
         new_issue = self.jira.create_issue(fields=issue_dict)
         return new_issue
 
@@ -245,38 +408,50 @@ class MyJira:
         issue_dict = self.__build_issue(None, title, description, issue_type)
         ref_issue = MyJiraIssue(self.reference_issue)
         issue_dict[ref_issue.sprint_fieldname] = int(ref_issue.sprint[-1].id)     # Sprint
+        self.invalidate_search()
         new_issue = self.jira.create_issue(fields=issue_dict)
         return new_issue
 
     def create_sub_task(self, parent_issue, title, description, issue_type = "Sub-task"):
         issue_dict = self.__build_issue(parent_issue, title, description, issue_type)
+        self.invalidate_search()
         new_issue = self.jira.create_issue(fields=issue_dict)
         return new_issue
 
+    # Returns the project's issue types split into the groups we choose from, fetching and splitting them once per project
+    def get_issue_types(self, project_id):
+        groups = self.issue_types_cache.get(project_id)
+        if groups == None:
+            issuetypes = self.jira.issue_types_for_project(project_id)
+            groups = {
+                    "possible": [i for i in issuetypes if i.name not in IGNORED_ISSUE_TYPES],
+                    "sub-task": [i for i in issuetypes if i.name == "Sub-task"],
+                    "other": [i for i in issuetypes if i.name != "Sub-task"],
+                }
+            self.issue_types_cache[project_id] = groups
+        return groups
+
     def get_possible_types(self):
-        possible_types = self.jira.issue_types_for_project(self.reference_issue.fields.project.id)
-        possible_types = [i for i in possible_types if i.name not in self.ignored_issue_types]
-        return possible_types
+        return self.get_issue_types(self.reference_issue.fields.project.id)["possible"]
 
     def get_statuses(self, issue):
-        issuetypes = self.jira.issue_types_for_project(issue.fields.project.id)
-        if issue.fields.issuetype.name == "Sub-task":
-            issuetypes = [i for i in issuetypes if i.name == "Sub-task"]
-        else:
-            issuetypes = [i for i in issuetypes if i.name != "Sub-task"]
+        groups = self.get_issue_types(issue.fields.project.id)
+        issuetypes = groups["sub-task"] if issue.fields.issuetype.name == "Sub-task" else groups["other"]
         statuses = issuetypes[0].statuses
 
         return statuses
 
     def change_status(self, issue, status):
+        self.invalidate_search()
         self.jira.transition_issue(issue, status)
 
+    # These run for every row of their columns, so read the one field rather than wrapping the whole issue
     def get_story_points(self, issue):
-        sp = MyJiraIssue(issue).story_points
+        sp = getattr(issue.fields, FIELD_TRANSLATIONS["story_points"], "")
         return str(sp) if sp != None else ""
 
     def get_priority_score(self, issue):
-        ps = MyJiraIssue(issue).priority_score
+        ps = getattr(issue.fields, FIELD_TRANSLATIONS["priority_score"], "")
         return str(ps) if ps != None else ""
 
     def get_assignee(self, issue):
@@ -286,9 +461,11 @@ class MyJira:
             return ""
 
     def assign_to_me(self, issue):
+        self.invalidate_search()
         self.jira.assign_issue(issue, self.username)
 
     def assign_to(self, issue, shortname):
+        self.invalidate_search()
         username = self.short_names_to_ids[shortname]
         if username == "":
             username = None
@@ -296,33 +473,44 @@ class MyJira:
 
     # Returns a dictionary of keypresses to shortnames
     def get_user_shortnames(self):
-        return self.short_names_to_ids.keys()
+        return self.short_names
+
+    # Opening a browser can take a while (particularly on Windows), so don't make the UI wait for it
+    def __open_url(self, url):
+        threading.Thread(target=webbrowser.open, args=(url,), daemon=True).start()
 
     def browse_to(self, issue):
-        webbrowser.open(issue.permalink())
+        self.__open_url(issue.permalink())
 
     def browse_sprint_board(self):
-        webbrowser.open(f"{self.url}/secure/RapidBoard.jspa?rapidView={self.backlog_board_id}")
+        self.__open_url(self.sprint_board_url)
 
     def browse_backlog_board(self):
-        url = f"{self.url}/secure/RapidBoard.jspa?rapidView={self.backlog_board_id}&view=planning.nodetail"
-        webbrowser.open(url)
+        self.__open_url(self.backlog_board_url)
 
     def browse_kanban_board(self):
-        url = f"{self.url}/secure/RapidBoard.jspa?rapidView={self.kanban_board_id}"
-        webbrowser.open(url)
+        self.__open_url(self.kanban_board_url)
 
     # Downloads all attachments for the given issue to the given path, calls callback with the filename before each download
     def download_attachments(self, issue, path, callback=None):
         attachments = issue.fields.attachment
-        for attachment in attachments:
-            filename = attachment.filename
-            local_filename = os.path.join(path, filename)
-            if not os.path.exists(local_filename):
-                if (callback != None):
-                    callback(filename)
-                with open(local_filename, "wb") as f:
-                    f.write(attachment.get())
+        started = set()     # Attachments can share a filename, only the first is downloaded
+        with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_DOWNLOADS) as executor:
+            futures = []
+            for attachment in attachments:
+                filename = attachment.filename
+                local_filename = os.path.join(path, filename)
+                if not os.path.exists(local_filename) and filename not in started:
+                    started.add(filename)
+                    if (callback != None):
+                        callback(filename)
+                    futures.append(executor.submit(self.__download_attachment, attachment, local_filename))
+            for future in futures:
+                future.result()
+
+    def __download_attachment(self, attachment, local_filename):
+        with open(local_filename, "wb") as f:
+            f.write(attachment.get())
 
     #
     # Builds an issue dictionary from the reference issue
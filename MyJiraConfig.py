@@ -1,5 +1,45 @@
 import os
 import json
+import shutil
+import threading
+
+# orjson is optional, it parses the config considerably faster than json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# (field, values that mean it hasn't been filled in, error) for each required jira setting
+REQUIRED_JIRA_FIELDS = (
+        ('url', (None, ""), "Jira URL not found in config"),
+        ('username', (None, "", "myemail@mycorp.com"), "Jira username not specified in config"),
+        ('fullname', (None, "", "My Name"), "Jira fullname not specified in config"),
+        ('password', (None, ""), "Jira password not found in config"),
+    )
+
+# The settings carried over from a pre 1.0 config file into the generated template when upgrading
+UPGRADED_SETTINGS = (
+        ('jira', 'url'),
+        ('jira', 'username'),
+        ('jira', 'password'),
+        ('jira', 'fullname'),
+        ('github', 'username'),
+        ('github', 'login'),
+        ('github', 'token'),
+        ('github', 'repo_owner'),
+        ('github', 'repo_name'),
+        ('git', 'initials'),
+    )
+
+# The settings carried over as well if the old config has an xray section
+UPGRADED_XRAY_SETTINGS = (
+        ('xray', 'client_id'),
+        ('xray', 'client_secret'),
+    )
+
+# config file path -> (modification time, loaded config), shared by every MyJiraConfig in the process
+loaded_configs = {}
+loaded_configs_lock = threading.Lock()
 
 class MyJiraConfig:
     def __init__(self):
@@ -16,6 +56,7 @@ class MyJiraConfig:
                 "username": "myemail@mycorp.com",
                 "fullname": "My Name",
                 "default_team": "Sparklemuffin",
+                "search_cache_seconds": 60,
                 "teams": {
                     "Sparklemuffin": {
                         "team_id": 34,
@@ -104,58 +145,59 @@ class MyJiraConfig:
         if 'xray' not in json_config:
             raise ValueError("Xray config not found")
         jira = json_config.get('jira')
-        if jira.get('url') is None or jira.get('url') == "":
-            raise ValueError("Jira URL not found in config")
-        if jira.get('username') is None or jira.get('username') == "" or jira.get('username') == "myemail@mycorp.com":
-            raise ValueError("Jira username not specified in config")
-        if jira.get('fullname') is None or jira.get('fullname') == "" or jira.get('fullname') == "My Name":
-            raise ValueError("Jira fullname not specified in config")
-        if jira.get('password') is None or jira.get('password') == "":
-            raise ValueError("Jira password not found in config")
+        for field, unset_values, error in REQUIRED_JIRA_FIELDS:
+            if jira.get(field) in unset_values:
+                raise ValueError(error)
 
+    # Brings an older config up to date, the file is only rewritten if something needed upgrading
     def upgrade(self, config):
         try:
+            upgraded = False
             # Pre 1.0 config files did not have a default_team
             if 'default_team' not in config['jira']:
                 # Backup the file
-                with open(self.config_file_path, "r") as config_file:
-                    with open(self.config_file_path + ".upgraded.bak", "w") as backup_file:
-                        backup_file.write(config_file.read())
+                shutil.copyfile(self.config_file_path, self.config_file_path + ".upgraded.bak")
 
                 old_config = config
                 generated_config = self.generate_template()
-                generated_config['jira']['url'] = old_config['jira']['url']
                 print (f"Upgrading username {old_config['jira']['username']}")
-                generated_config['jira']['username'] = old_config['jira']['username']
-                generated_config['jira']['password'] = old_config['jira']['password']
-                generated_config['jira']['fullname'] = old_config['jira']['fullname']
-                generated_config['github']['username'] = old_config['github']['username']
-                generated_config['github']['login'] = old_config['github']['login']
-                generated_config['github']['token'] = old_config['github']['token']
-                generated_config['github']['repo_owner'] = old_config['github']['repo_owner']
-                generated_config['github']['repo_name'] = old_config['github']['repo_name']
-                generated_config['git']['initials'] = old_config['git']['initials']
-                if 'xray' in old_config:
-                    generated_config['xray']['client_id'] = old_config['xray']['client_id']
-                    generated_config['xray']['client_secret'] = old_config['xray']['client_secret']
+                settings = UPGRADED_SETTINGS + UPGRADED_XRAY_SETTINGS if 'xray' in old_config else UPGRADED_SETTINGS
+                for (section, setting) in settings:
+                    generated_config[section][setting] = old_config[section][setting]
                 username = old_config['jira']['username']
-                company = username.split('@')[1].split('.')[0]
+                company = username.split('@', 1)[1].split('.', 1)[0]
                 for team in generated_config['jira']['teams']:
                     for short_name in generated_config['jira']['teams'][team]['short_names_to_ids']:
                         generated_config['jira']['teams'][team]['short_names_to_ids'][short_name] = generated_config['jira']['teams'][team]['short_names_to_ids'][short_name].replace('mycorp', company)
 
                 config = generated_config
+                upgraded = True
             if 'version' not in config:
                 config['version'] = 1.0
-            with open(self.config_file_path, "w") as config_file:
-                json.dump(config, config_file, indent=4)
+                upgraded = True
+            if upgraded:
+                with open(self.config_file_path, "w") as config_file:
+                    json.dump(config, config_file, indent=4)
             return config  
         except:
             raise ValueError("Failed to upgrade config file")
 
-    def load(self):
-        with open(self.config_file_path, 'r') as json_file:
-            config = json.load(json_file)
+    # Loads, upgrades and validates the config file, later calls from anywhere in the process return the same config
+    # without reading it again unless the file has changed since or reload is True
+    def load(self, reload=False):
+        with loaded_configs_lock:
+            loaded = loaded_configs.get(self.config_file_path)
+            if loaded != None and not reload and loaded[0] == os.stat(self.config_file_path).st_mtime_ns:
+                return loaded[1]
+
+            if orjson != None:
+                with open(self.config_file_path, 'rb') as json_file:
+                    config = orjson.loads(json_file.read())
+            else:
+                with open(self.config_file_path, 'r') as json_file:
+                    config = json.load(json_file)
             config = self.upgrade(config)
             self.validate(config)
+            # Upgrading rewrites the file, so take the modification time afterwards
+            loaded_configs[self.config_file_path] = (os.stat(self.config_file_path).st_mtime_ns, config)
             return config
@@ -5,6 +5,9 @@ from tkinter import messagebox
 import threading
 import re
 
+# How often to check whether a background task has finished
+TASK_POLL_MS = 50
+
 class TkTableUi:
     def __init__(self, title):
         self.headers = ()
@@ -95,9 +98,16 @@ class TkTableUi:
                 thread_exception = e
         thread = threading.Thread(target=inner_task)
         thread.start()
-        while thread.is_alive():
-            self.root.update_idletasks()
-            self.root.update()
+
+        # Keep handling events (so the progress bar animates) until the task is done, without spinning a core
+        done = tk.BooleanVar(self.root, value=False)
+        def poll():
+            if thread.is_alive():
+                self.root.after(TASK_POLL_MS, poll)
+            else:
+                done.set(True)
+        self.root.after(TASK_POLL_MS, poll)
+        self.root.wait_variable(done)
         self.hide_progress_bar()
         if thread_exception:
             raise thread_exception
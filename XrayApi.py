@@ -1,5 +1,7 @@
 import requests
 import json
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 import logging
 log = logging.getLogger(__name__)
@@ -10,19 +12,33 @@ log = logging.getLogger(__name__)
 # https://github.com/Xray-App/xray-cloud-demo-project/blob/master/xray.py
 XRAY_API = 'https://xray.cloud.getxray.app/api/v2'
 
+# Enough pooled connections for the concurrent test case creation in JiraXrayIssue
+POOL_CONNECTIONS = 16
+POOL_MAXSIZE = 32
+
+# A pooled session that retries failed requests, one can be shared by several XrayApi so that they reuse connections
+def create_session():
+    session = requests.Session()
+    retries = Retry(total=3, backoff_factor=0.3)
+    session.mount('https://', HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, max_retries=retries))
+    return session
+
 class XrayApi:
-    def __init__(self, config):
+    def __init__(self, config, session=None):
         self.token = ''
         self.client_id = config['client_id']
         self.client_secret = config['client_secret']
         self.project_id = config['project_id']
 
+        # Share one session so that every call reuses the same keep-alive connection rather than a new TLS handshake
+        self.session = session if session != None else create_session()
+
     def authenticate(self):
         log.debug('Authenticating with Xray Api...')
 
         json_data = json.dumps({"client_id": self.client_id, "client_secret": self.client_secret})
         
-        resp = requests.post(f'{XRAY_API}/authenticate', data=json_data, headers={'Content-Type':'application/json'})
+        resp = self.session.post(f'{XRAY_API}/authenticate', data=json_data, headers={'Content-Type':'application/json'})
         resp.raise_for_status()
         
         self.token = 'Bearer ' + resp.text.replace("\"","")
@@ -42,7 +58,7 @@ class XrayApi:
 
             json_data = f'mutation {{ createFolder( testPlanId: "{testPlanId}", path: "{path}") {{ warnings }} }}'
 
-        resp = requests.post(f'{XRAY_API}/graphql', json={ "query": json_data }, headers={'Content-Type':'application/json', 'Authorization': self.token})
+        resp = self.session.post(f'{XRAY_API}/graphql', json={ "query": json_data }, headers={'Content-Type':'application/json', 'Authorization': self.token})
 
         resp.raise_for_status()
     
@@ -61,7 +77,7 @@ class XrayApi:
 
             json_data = f'mutation {{ addTestsToFolder( testPlanId: "{testPlanId}", path: "{path}", testIssueIds: {testIssueIds_json}) {{ warnings }} }}'
 
-        resp = requests.post(f'{XRAY_API}/graphql', json={ "query": json_data }, headers={'Content-Type':'application/json', 'Authorization': self.token})
+        resp = self.session.post(f'{XRAY_API}/graphql', json={ "query": json_data }, headers={'Content-Type':'application/json', 'Authorization': self.token})
         resp.raise_for_status()
     
         return resp.json()
@@ -116,7 +132,7 @@ class XrayApi:
             }}
         '''
 
-        resp = requests.post(f'{XRAY_API}/graphql', json={ "query": json_data }, headers={'Content-Type':'application/json', 'Authorization': self.token})
+        resp = self.session.post(f'{XRAY_API}/graphql', json={ "query": json_data }, headers={'Content-Type':'application/json', 'Authorization': self.token})
         resp.raise_for_status()
 
         if (resp.json().get('errors') != None):
@@ -153,7 +169,7 @@ class XrayApi:
             }}
         '''
 
-        resp = requests.post(f'{XRAY_API}/graphql', json={ "query": json_data }, headers={'Content-Type':'application/json', 'Authorization': self.token})
+        resp = self.session.post(f'{XRAY_API}/graphql', json={ "query": json_data }, headers={'Content-Type':'application/json', 'Authorization': self.token})
         resp.raise_for_status()
     
         return resp.json()
@@ -184,7 +200,7 @@ class XrayApi:
             }}
         '''
 
-        resp = requests.post(f'{XRAY_API}/graphql', json={ "query": json_data }, headers={'Content-Type':'application/json', 'Authorization': self.token})
+        resp = self.session.post(f'{XRAY_API}/graphql', json={ "query": json_data }, headers={'Content-Type':'application/json', 'Authorization': self.token})
         resp.raise_for_status()
     
         return resp.json()
@@ -201,7 +217,7 @@ class XrayApi:
                 }}
             }}
         '''
-        resp = requests.post(f'{XRAY_API}/graphql', json={ "query": json_data }, headers={'Content-Type':'application/json', 'Authorization': self.token})
+        resp = self.session.post(f'{XRAY_API}/graphql', json={ "query": json_data }, headers={'Content-Type':'application/json', 'Authorization': self.token})
         resp.raise_for_status()
 
         if (resp.json().get('errors') != None):
@@ -238,7 +254,7 @@ class XrayApi:
             }}
         '''
 
-        resp = requests.post(f'{XRAY_API}/graphql', json={ "query": json_data }, headers={'Content-Type':'application/json', 'Authorization': self.token})
+        resp = self.session.post(f'{XRAY_API}/graphql', json={ "query": json_data }, headers={'Content-Type':'application/json', 'Authorization': self.token})
         resp.raise_for_status()
 
         if (resp.json().get('errors') != None):
@@ -249,37 +265,37 @@ class XrayApi:
     def import_xray_json_results(self, results):
         json_data = json.dumps(results)
         
-        resp = requests.post(f'{XRAY_API}/import/execution', data=json_data, headers={'Content-Type':'application/json', 'Authorization': self.token})
+        resp = self.session.post(f'{XRAY_API}/import/execution', data=json_data, headers={'Content-Type':'application/json', 'Authorization': self.token})
         resp.raise_for_status()
         
         return resp.json()
 
     def import_cucumber_results(self, results, info):
-        resp = requests.post(f'{XRAY_API}/import/execution/cucumber/multipart', files={'results': results, 'info': info}, headers={'Authorization': self.token})
+        resp = self.session.post(f'{XRAY_API}/import/execution/cucumber/multipart', files={'results': results, 'info': info}, headers={'Authorization': self.token})
         resp.raise_for_status()
         
         return resp.json()
 
     def import_robot_results(self, results, info):
-        resp = requests.post(f'{XRAY_API}/import/execution/robot/multipart', files={'results': results, 'info': info}, headers={'Authorization': self.token})
+        resp = self.session.post(f'{XRAY_API}/import/execution/robot/multipart', files={'results': results, 'info': info}, headers={'Authorization': self.token})
         resp.raise_for_status()
         
         return resp.json()
 
     def import_nunit_results(self, results, info):
-        resp = requests.post(f'{XRAY_API}/import/execution/nunit/multipart', files={'results': results, 'info': info}, headers={'Authorization': self.token})
+        resp = self.session.post(f'{XRAY_API}/import/execution/nunit/multipart', files={'results': results, 'info': info}, headers={'Authorization': self.token})
         resp.raise_for_status()
         
         return resp.json()
 
     def import_testng_results(self, results, info):
-        resp = requests.post(f'{XRAY_API}/import/execution/testng/multipart', files={'results': results, 'info': info}, headers={'Authorization': self.token})
+        resp = self.session.post(f'{XRAY_API}/import/execution/testng/multipart', files={'results': results, 'info': info}, headers={'Authorization': self.token})
         resp.raise_for_status()
         
         return resp.json()
 
     def import_junit_results(self, results, info):
-        resp = requests.post(f'{XRAY_API}/import/execution/junit/multipart', files={'results': results, 'info': info}, headers={'Authorization': self.token})
+        resp = self.session.post(f'{XRAY_API}/import/execution/junit/multipart', files={'results': results, 'info': info}, headers={'Authorization': self.token})
         resp.raise_for_status()
         
         return resp.json()